@@ -0,0 +1,10 @@
+"""
+Task Manager CLI entry point for ``python -m lib``.
+"""
+
+import sys
+
+from .cli_tool import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,36 +5,101 @@ A command-line interface for managing tasks using object-oriented programming.
 Supports adding tasks to users and marking tasks as complete.
 """
 
-import argparse
+import sqlite3
 import sys
-import os
+from types import SimpleNamespace
 
-# Add the lib directory to the Python path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from .models import Task, User
+from .storage import TaskDatabase, default_db_path
 
-from lib.models import Task, User
 
-# Global dictionary to store users and their tasks
-users = {}
+class DatabaseUnavailableError(Exception):
+    """Raised when the task database cannot be opened."""
 
 
-def add_task(args):
+class Registry:
+    """Holds the users known to a CLI run and their optional database."""
+
+    __slots__ = ("users", "_db", "_db_path")
+
+    def __init__(self, db=None, db_path=None):
+        self.users = {}
+        # Persistent task store; None keeps everything in memory
+        self._db = db
+        # Opened on first use, so help and usage errors never touch it
+        self._db_path = db_path
+
+    @property
+    def db(self):
+        """Return the task database, opening it on first use.
+
+        Raises DatabaseUnavailableError if the database cannot be opened.
+        """
+        if self._db is None and self._db_path is not None:
+            try:
+                self._db = TaskDatabase(self._db_path)
+            except sqlite3.Error as exc:
+                raise DatabaseUnavailableError(
+                    f"❌ Cannot open task database '{self._db_path}': {exc}"
+                ) from exc
+            self._db_path = None
+        return self._db
+
+    def close(self):
+        """Close the task database if it was opened."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def get_user(self, name):
+        """Return the named user, loading them from the database if needed.
+
+        Raises KeyError if the user does not exist.
+        """
+        users = self.users
+        try:
+            return users[name]
+        except KeyError:
+            user = self.db.load_user(name) if self.db is not None else None
+            if user is None:
+                raise
+        users[name] = user
+        return user
+
+
+def add_task(args, reg):
     """Add a new task for a user."""
-    # Get existing user or create new one
-    user = users.get(args.user)
-    if not user:
-        user = User(args.user)
-        users[args.user] = user
+    if reg.db is not None:
+        # A single indexed insert; the user's stored tasks are never loaded
+        added = reg.db.add_task(args.user, args.title)
+        # A user not already in memory is built only for the confirmation
+        # message and is not cached, since it lacks their stored tasks
+        try:
+            user = reg.users[args.user]
+        except KeyError:
+            user = User(args.user)
+    else:
+        # Get existing user or create new one
+        try:
+            user = reg.get_user(args.user)
+        except KeyError:
+            user = User(args.user)
+            reg.users[args.user] = user
+        added = user.get_task_by_title(args.title) is None
+    
+    if not added:
+        print(f"ℹ️  Task '{args.title}' already exists for {args.user}.")
+        return
     
     # Create and add the task
-    task = Task(args.title)
-    user.add_task(task)
+    print(user.add_task(Task(args.title)))
 
 
-def complete_task(args):
+def complete_task(args, reg):
     """Mark a task as complete for a user."""
-    user = users.get(args.user)
-    if not user:
+    try:
+        user = reg.get_user(args.user)
+    except KeyError:
         print(f"❌ User '{args.user}' not found.")
         return
     
@@ -46,32 +111,91 @@ def complete_task(args):
     if task.completed:
         print(f"ℹ️  Task '{args.title}' is already completed.")
     else:
-        task.complete()
+        print(task.complete())
+        if reg.db is not None:
+            reg.db.complete_task(args.user, args.title)
 
 
-def list_tasks(args):
+def list_tasks(args, reg):
     """List all tasks for a user."""
-    user = users.get(args.user)
-    if not user:
+    try:
+        user = reg.get_user(args.user)
+    except KeyError:
         print(f"❌ User '{args.user}' not found.")
         return
     
-    user.list_tasks()
+    print(user.list_tasks())
 
 
-def list_users(args):
+def list_users(args, reg):
     """List all users in the system."""
-    if not users:
+    # Stored users are counted in SQL rather than loaded task by task
+    counts = reg.db.user_task_counts() if reg.db is not None else {}
+    lines = [f"  • {User.summary(name, count)}" for name, count in counts.items()]
+    lines += [f"  • {user}" for name, user in reg.users.items() if name not in counts]
+
+    if not lines:
         print("No users found.")
         return
     
-    print("\nAll users:")
-    for username, user in users.items():
-        print(f"  • {user}")
+    sys.stdout.write("\nAll users:\n" + "\n".join(lines) + "\n")
+
+
+# Positional arguments for each command, used by the argparse-free fast path
+FAST_COMMANDS = {
+    "add-task": (add_task, ("user", "title")),
+    "complete-task": (complete_task, ("user", "title")),
+    "list-tasks": (list_tasks, ("user",)),
+    "list-users": (list_users, ()),
+}
+
+
+def fast_dispatch(argv, reg):
+    """Run a well-formed command without building the argparse parser.
+
+    Returns True if the command was handled, or False if argparse should
+    take over (help, options, unknown commands or wrong argument counts).
+    """
+    if not argv:
+        return False
+    entry = FAST_COMMANDS.get(argv[0])
+    if entry is None:
+        return False
+    func, names = entry
+    values = argv[1:]
+    if len(values) != len(names) or any(v.startswith("-") for v in values):
+        return False
+    func(SimpleNamespace(command=argv[0], **dict(zip(names, values))), reg)
+    return True
+
+
+def main(argv=None):
+    """Main CLI entry point.
+
+    ``argv`` defaults to ``sys.argv[1:]``; pass a list to run the CLI
+    in-process. Returns the exit status.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    reg = Registry(db_path=default_db_path())
+    try:
+        run(argv, reg)
+    except DatabaseUnavailableError as exc:
+        print(exc)
+        return 1
+    finally:
+        reg.close()
+    return 0
+
+
+def run(argv, reg):
+    """Dispatch a list of command-line arguments to the matching command."""
+    if fast_dispatch(argv, reg):
+        return
 
+    # Imported here so the fast path and library imports never load argparse
+    import argparse
 
-def main():
-    """Main CLI entry point."""
     parser = argparse.ArgumentParser(
         description="Task Manager CLI - Manage tasks for users",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -123,13 +247,13 @@ Examples:
     users_parser.set_defaults(func=list_users)
 
     # Parse arguments and execute appropriate function
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if hasattr(args, "func"):
-        args.func(args)
+        args.func(args, reg)
     else:
         parser.print_help()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,47 +1,93 @@
+import sys
+from typing import Dict, Iterable, List, Optional
+
+# Status glyphs indexed by a task's completed flag
+_STATUS = ("⭕", "✅")
+
+# User display form, filled with the name and task count
+_USER_TEMPLATE = "User: %s (%d tasks)"
+
+
+def _render_status(completed: bool, title: str) -> str:
+    """Return the display form of a task, e.g. '✅ Write unit tests'."""
+    return f"{_STATUS[completed]} {title}"
+
+
 class Task:
     """Represents a task with a title and completion status."""
     
-    def __init__(self, title):
-        self.title = title
-        self.completed = False
+    __slots__ = ("title", "completed", "_str")
 
-    def complete(self):
-        """Mark the task as completed and print confirmation."""
+    def __init__(self, title: str, completed: bool = False) -> None:
+        # Interned so title comparisons can short-circuit on identity
+        self.title: str = sys.intern(title)
+        self.completed: bool = completed
+        # Rendered form, refreshed only when the status changes
+        self._str: str = _render_status(completed, self.title)
+
+    def complete(self) -> str:
+        """Mark the task as completed and return a confirmation message."""
         self.completed = True
-        print(f"✅ Task '{self.title}' completed.")
+        self._str = _render_status(True, self.title)
+        return f"✅ Task '{self.title}' completed."
 
-    def __str__(self):
-        status = "✅" if self.completed else "⭕"
-        return f"{status} {self.title}"
+    def __str__(self) -> str:
+        return self._str
 
 
 class User:
     """Represents a user with a name and a list of tasks."""
     
-    def __init__(self, name):
-        self.name = name
-        self.tasks = []
+    __slots__ = ("name", "tasks", "_task_by_title", "_str_cache")
+
+    def __init__(self, name: str, tasks: Optional[Iterable[Task]] = None) -> None:
+        self.name: str = name
+        self.tasks: List[Task] = []
+        # Index of tasks by title; keeps the first task added for a title
+        self._task_by_title: Dict[str, Task] = {}
+        # Rendered form, cleared whenever the task list changes
+        self._str_cache: Optional[str] = None
+        if tasks:
+            self.add_tasks(tasks)
 
-    def add_task(self, task):
-        """Add a task to the user's task list."""
+    def add_task(self, task: Task) -> str:
+        """Add a task to the user's task list and return a confirmation message."""
         self.tasks.append(task)
-        print(f"📌 Task '{task.title}' added to {self.name}.")
+        self._task_by_title.setdefault(task.title, task)
+        self._str_cache = None
+        return f"📌 Task '{task.title}' added to {self.name}."
+
+    def add_tasks(self, tasks: Iterable[Task]) -> str:
+        """Add several tasks at once and return a single confirmation message."""
+        new_tasks = list(tasks)
+        self.tasks.extend(new_tasks)
+        index = self._task_by_title
+        for task in new_tasks:
+            index.setdefault(task.title, task)
+        self._str_cache = None
+        return f"📌 {len(new_tasks)} tasks added to {self.name}."
 
-    def get_task_by_title(self, title):
+    def get_task_by_title(self, title: str) -> Optional[Task]:
         """Search for a task by its title in the user's task list."""
-        for task in self.tasks:
-            if task.title == title:
-                return task
-        return None
+        return self._task_by_title.get(title)
 
-    def list_tasks(self):
-        """Display all tasks for the user."""
+    def list_tasks(self) -> str:
+        """Return a listing of all tasks for the user."""
         if not self.tasks:
-            print(f"{self.name} has no tasks.")
-        else:
-            print(f"\n{self.name}'s tasks:")
-            for i, task in enumerate(self.tasks, 1):
-                print(f"  {i}. {task}")
-
-    def __str__(self):
-        return f"User: {self.name} ({len(self.tasks)} tasks)"
\ No newline at end of file
+            return f"{self.name} has no tasks."
+        lines: List[str] = []
+        append = lines.append
+        for i, task in enumerate(self.tasks, 1):
+            append("  %d. %s" % (i, task._str))
+        return f"\n{self.name}'s tasks:\n" + "\n".join(lines)
+
+    @staticmethod
+    def summary(name: str, task_count: int) -> str:
+        """Return the display form of a user with the given task count."""
+        return _USER_TEMPLATE % (name, task_count)
+
+    def __str__(self) -> str:
+        if self._str_cache is None:
+            self._str_cache = User.summary(self.name, len(self.tasks))
+        return self._str_cache
+
@@ -0,0 +1,77 @@
+"""
+SQLite persistence for the Task Manager.
+
+Tasks are stored one row per (user, title) so each CLI command is a single
+indexed statement instead of a reload of the whole task history.
+"""
+
+import os
+import sqlite3
+
+from .models import Task, User
+
+# Environment variable that overrides the database location
+DB_ENV_VAR = "TASK_MANAGER_DB"
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".task_manager.db")
+
+
+def default_db_path():
+    """Return the database path, honouring the TASK_MANAGER_DB override."""
+    return os.environ.get(DB_ENV_VAR, DEFAULT_DB_PATH)
+
+
+class TaskDatabase:
+    """Stores users' tasks in a SQLite database."""
+
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        self.conn = sqlite3.connect(self.path)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " user TEXT NOT NULL,"
+                " title TEXT NOT NULL,"
+                " completed INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (user, title))"
+            )
+
+    def add_task(self, user, title):
+        """Insert a task for a user.
+
+        Returns False if the user already has a task with that title.
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO tasks (user, title) VALUES (?, ?)",
+                (user, title),
+            )
+        return cursor.rowcount == 1
+
+    def complete_task(self, user, title):
+        """Mark a user's task as completed."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE tasks SET completed = 1 WHERE user = ? AND title = ?",
+                (user, title),
+            )
+
+    def load_user(self, name):
+        """Return the named user with their tasks, or None if unknown."""
+        rows = self.conn.execute(
+            "SELECT title, completed FROM tasks WHERE user = ? ORDER BY rowid",
+            (name,),
+        ).fetchall()
+        if not rows:
+            return None
+        return User(name, [Task(title, bool(completed)) for title, completed in rows])
+
+    def user_task_counts(self):
+        """Return each stored user's task count, in order of first task added."""
+        rows = self.conn.execute(
+            "SELECT user, COUNT(*) FROM tasks GROUP BY user ORDER BY MIN(rowid)"
+        )
+        return dict(rows)
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
@@ -0,0 +1,18 @@
+"""
+Build script for the Task Manager package.
+
+Set TASK_MANAGER_MYPYC=1 to compile lib/models.py into a C extension with
+mypyc; otherwise the pure-Python modules are installed unchanged.
+"""
+
+import os
+
+from setuptools import setup
+
+ext_modules = []
+if os.environ.get("TASK_MANAGER_MYPYC") == "1":
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify(["lib/models.py"])
+
+setup(ext_modules=ext_modules)
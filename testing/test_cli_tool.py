@@ -4,33 +4,42 @@ Test suite for the Task Manager CLI Tool
 Tests both the CLI functionality and the underlying object models.
 """
 
-import subprocess
 import tempfile
 import os
-import sys
 import unittest
 from io import StringIO
-from contextlib import redirect_stdout
-
-# Add the lib directory to the Python path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from contextlib import redirect_stderr, redirect_stdout
+from types import SimpleNamespace
+from unittest import mock
 
 from lib.models import Task, User
+from lib.storage import DB_ENV_VAR, TaskDatabase
+
 
+def run_cli_command(command_args, db_path=None):
+    """Helper function to run CLI command in-process and capture output.
 
-def run_cli_command(command_args):
-    """Helper function to run CLI command and capture output."""
-    # Get the path to cli_tool.py
-    cli_path = os.path.join(os.path.dirname(__file__), '..', 'lib', 'cli_tool.py')
+    Each call uses a throwaway database unless ``db_path`` is given.
+    """
+    from lib.cli_tool import main
     
-    # Run the command
-    result = subprocess.run(
-        ["python", cli_path] + command_args, 
-        capture_output=True, 
-        text=True
-    )
+    stdout, stderr = StringIO(), StringIO()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = {DB_ENV_VAR: db_path or os.path.join(tmp_dir, "tasks.db")}
+        
+        # Run the command, treating argparse exits like a process exit
+        with mock.patch.dict(os.environ, env), \
+                redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                returncode = main(command_args) or 0
+            except SystemExit as exc:
+                returncode = exc.code or 0
     
-    return result
+    return SimpleNamespace(
+        returncode=returncode,
+        stdout=stdout.getvalue(),
+        stderr=stderr.getvalue()
+    )
 
 
 class TestTaskModel(unittest.TestCase):
@@ -46,22 +55,17 @@ class TestTaskModel(unittest.TestCase):
         """Test marking a task as complete."""
         task = Task("Test task")
         
-        # Capture the print output
-        output = StringIO()
-        with redirect_stdout(output):
-            task.complete()
+        message = task.complete()
         
         self.assertTrue(task.completed)
-        self.assertIn("Task 'Test task' completed", output.getvalue())
+        self.assertIn("Task 'Test task' completed", message)
     
     def test_task_string_representation(self):
         """Test task string representation."""
         incomplete_task = Task("Incomplete task")
         complete_task = Task("Complete task")
         
-        # Redirect stdout to avoid seeing the completion message
-        with redirect_stdout(StringIO()):
-            complete_task.complete()
+        complete_task.complete()
         
         self.assertIn("⭕", str(incomplete_task))
         self.assertIn("✅", str(complete_task))
@@ -81,14 +85,22 @@ class TestUserModel(unittest.TestCase):
         user = User("Bob")
         task = Task("Complete project")
         
-        # Capture the print output
-        output = StringIO()
-        with redirect_stdout(output):
-            user.add_task(task)
+        message = user.add_task(task)
         
         self.assertEqual(len(user.tasks), 1)
         self.assertEqual(user.tasks[0], task)
-        self.assertIn("Task 'Complete project' added to Bob", output.getvalue())
+        self.assertIn("Task 'Complete project' added to Bob", message)
+    
+    def test_add_tasks_to_user(self):
+        """Test adding several tasks to a user at once."""
+        user = User("Bea")
+        tasks = [Task("Task 1"), Task("Task 2")]
+        
+        message = user.add_tasks(tasks)
+        
+        self.assertEqual(user.tasks, tasks)
+        self.assertIs(user.get_task_by_title("Task 2"), tasks[1])
+        self.assertIn("2 tasks added to Bea", message)
     
     def test_get_task_by_title_found(self):
         """Test finding a task by title."""
@@ -96,9 +108,8 @@ class TestUserModel(unittest.TestCase):
         task1 = Task("Task 1")
         task2 = Task("Task 2")
         
-        with redirect_stdout(StringIO()):
-            user.add_task(task1)
-            user.add_task(task2)
+        user.add_task(task1)
+        user.add_task(task2)
         
         found_task = user.get_task_by_title("Task 2")
         self.assertEqual(found_task, task2)
@@ -108,21 +119,36 @@ class TestUserModel(unittest.TestCase):
         user = User("David")
         task = Task("Existing task")
         
-        with redirect_stdout(StringIO()):
-            user.add_task(task)
+        user.add_task(task)
         
         found_task = user.get_task_by_title("Non-existent task")
         self.assertIsNone(found_task)
+
+    def test_get_task_by_title_duplicate_returns_first(self):
+        """Test that duplicate titles resolve to the first task added."""
+        user = User("Dana")
+        first = Task("Same title")
+        second = Task("Same title")
+
+        user.add_task(first)
+        user.add_task(second)
+
+        self.assertIs(user.get_task_by_title("Same title"), first)
+
+    def test_user_string_tracks_task_count(self):
+        """Test that the user string updates after adding a task."""
+        user = User("Grace")
+        self.assertEqual(str(user), "User: Grace (0 tasks)")
+        
+        user.add_task(Task("Task 1"))
+        
+        self.assertEqual(str(user), "User: Grace (1 tasks)")
     
     def test_list_tasks_empty(self):
         """Test listing tasks when user has no tasks."""
         user = User("Emma")
         
-        output = StringIO()
-        with redirect_stdout(output):
-            user.list_tasks()
-        
-        self.assertIn("Emma has no tasks", output.getvalue())
+        self.assertIn("Emma has no tasks", user.list_tasks())
     
     def test_list_tasks_with_tasks(self):
         """Test listing tasks when user has tasks."""
@@ -130,20 +156,56 @@ class TestUserModel(unittest.TestCase):
         task1 = Task("Task 1")
         task2 = Task("Task 2")
         
-        with redirect_stdout(StringIO()):
-            user.add_task(task1)
-            user.add_task(task2)
+        user.add_task(task1)
+        user.add_task(task2)
         
-        output = StringIO()
-        with redirect_stdout(output):
-            user.list_tasks()
-        
-        output_text = output.getvalue()
+        output_text = user.list_tasks()
         self.assertIn("Frank's tasks:", output_text)
         self.assertIn("1. ⭕ Task 1", output_text)
         self.assertIn("2. ⭕ Task 2", output_text)
 
 
+class TestTaskDatabase(unittest.TestCase):
+    """Test the TaskDatabase persistence layer."""
+
+    def setUp(self):
+        self.db = TaskDatabase(":memory:")
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_load_user_round_trip(self):
+        """Test that stored tasks load back with their status."""
+        self.db.add_task("Alice", "Task 1")
+        self.db.add_task("Alice", "Task 2")
+        self.db.complete_task("Alice", "Task 1")
+
+        user = self.db.load_user("Alice")
+
+        self.assertEqual([task.title for task in user.tasks], ["Task 1", "Task 2"])
+        self.assertTrue(user.get_task_by_title("Task 1").completed)
+        self.assertFalse(user.get_task_by_title("Task 2").completed)
+
+    def test_add_task_reports_duplicates(self):
+        """Test that adding an existing title reports it was not inserted."""
+        self.assertTrue(self.db.add_task("Alice", "Task 1"))
+        self.assertFalse(self.db.add_task("Alice", "Task 1"))
+
+    def test_load_unknown_user(self):
+        """Test that loading an unknown user returns None."""
+        self.assertIsNone(self.db.load_user("Nobody"))
+
+    def test_user_task_counts(self):
+        """Test counting stored tasks per user."""
+        self.db.add_task("Bob", "Task 1")
+        self.db.add_task("Alice", "Task 2")
+        self.db.add_task("Bob", "Task 3")
+
+        counts = self.db.user_task_counts()
+
+        self.assertEqual(list(counts.items()), [("Bob", 2), ("Alice", 1)])
+
+
 class TestCLITool(unittest.TestCase):
     """Test the CLI tool functionality."""
     
@@ -158,20 +220,15 @@ class TestCLITool(unittest.TestCase):
         """Test the complete-task command in isolation."""
         # Create a simpler test that doesn't rely on subprocess
         # Import the modules directly and test the functionality
-        from lib.models import Task, User
-        from lib.cli_tool import complete_task
-        import lib.cli_tool
+        from lib.cli_tool import Registry, complete_task
         
-        # Set up test data
-        users = {}
+        # Set up test data in a fresh registry
+        reg = Registry()
         user = User("Bob")
-        users["Bob"] = user
+        reg.users["Bob"] = user
         
-        # Capture output for add_task
-        output = StringIO()
-        with redirect_stdout(output):
-            task = Task("Finish lab")
-            user.add_task(task)
+        task = Task("Finish lab")
+        user.add_task(task)
         
         # Create args object to simulate CLI arguments
         class Args:
@@ -179,30 +236,83 @@ class TestCLITool(unittest.TestCase):
                 self.user = user
                 self.title = title
         
-        # Patch the users dictionary in the cli_tool module
-        original_users = lib.cli_tool.users
-        lib.cli_tool.users = users
+        # Test completing the task
+        args = Args("Bob", "Finish lab")
         
-        try:
-            # Test completing the task
-            args = Args("Bob", "Finish lab")
-            
-            # Capture the output
-            output = StringIO()
-            with redirect_stdout(output):
-                complete_task(args)
-            
-            # Check the output
-            output_text = output.getvalue()
-            self.assertIn("Task 'Finish lab' completed", output_text)
-            
-            # Verify the task is actually completed
-            self.assertTrue(user.tasks[0].completed)
-            
-        finally:
-            # Restore original users dictionary
-            lib.cli_tool.users = original_users
+        # Capture the output
+        output = StringIO()
+        with redirect_stdout(output):
+            complete_task(args, reg)
+        
+        # Check the output
+        output_text = output.getvalue()
+        self.assertIn("Task 'Finish lab' completed", output_text)
+        
+        # Verify the task is actually completed
+        self.assertTrue(user.tasks[0].completed)
+    
+    def test_state_persists_between_commands(self):
+        """Test that tasks added in one run can be completed in the next."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "tasks.db")
+            run_cli_command(["add-task", "Bob", "Finish lab"], db_path)
+            result = run_cli_command(["complete-task", "Bob", "Finish lab"], db_path)
+            listing = run_cli_command(["list-tasks", "Bob"], db_path)
+        
+        self.assertIn("Task 'Finish lab' completed", result.stdout)
+        self.assertIn("1. ✅ Finish lab", listing.stdout)
+    
+    def test_add_existing_task(self):
+        """Test that adding a title twice reports it already exists."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "tasks.db")
+            run_cli_command(["add-task", "Alice", "Write tests"], db_path)
+            result = run_cli_command(["add-task", "Alice", "Write tests"], db_path)
+            listing = run_cli_command(["list-users"], db_path)
+        
+        self.assertIn("Task 'Write tests' already exists for Alice", result.stdout)
+        self.assertNotIn("added", result.stdout)
+        self.assertIn("User: Alice (1 tasks)", listing.stdout)
     
+    def test_add_task_does_not_load_stored_tasks(self):
+        """Test that add-task inserts without loading the user's tasks."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "tasks.db")
+            run_cli_command(["add-task", "Alice", "Task 1"], db_path)
+            with mock.patch.object(TaskDatabase, "load_user") as load_user:
+                result = run_cli_command(["add-task", "Alice", "Task 2"], db_path)
+        
+        load_user.assert_not_called()
+        self.assertIn("Task 'Task 2' added to Alice", result.stdout)
+    
+    def test_database_cannot_be_opened(self):
+        """Test that an unopenable database is reported, not raised."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "missing", "tasks.db")
+            result = run_cli_command(["list-users"], db_path)
+        
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(f"Cannot open task database '{db_path}'", result.stdout)
+    
+    def test_unknown_user(self):
+        """Test commands for a user that does not exist."""
+        result = run_cli_command(["complete-task", "Nobody", "Anything"])
+
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("User 'Nobody' not found", result.stdout)
+
+    def test_fast_dispatch_falls_back_to_argparse(self):
+        """Test that malformed or help invocations skip the fast path."""
+        from lib.cli_tool import Registry, fast_dispatch
+
+        reg = Registry()
+        self.assertFalse(fast_dispatch([], reg))
+        self.assertFalse(fast_dispatch(["--help"], reg))
+        self.assertFalse(fast_dispatch(["add-task", "Alice"], reg))
+        self.assertFalse(fast_dispatch(["add-task", "Alice", "--help"], reg))
+        self.assertFalse(fast_dispatch(["unknown-command"], reg))
+        self.assertEqual(reg.users, {})
+
     def test_help_command(self):
         """Test the help functionality."""
         result = run_cli_command(["--help"])
@@ -218,6 +328,17 @@ class TestCLITool(unittest.TestCase):
         
         self.assertEqual(result.returncode, 0)
         self.assertIn("usage:", result.stdout)
+    
+    def test_help_and_usage_errors_do_not_open_database(self):
+        """Test that help and argument errors never create the database."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "tasks.db")
+            run_cli_command(["--help"], db_path)
+            run_cli_command([], db_path)
+            result = run_cli_command(["add-task", "Alice"], db_path)
+            
+            self.assertEqual(result.returncode, 2)
+            self.assertFalse(os.path.exists(db_path))
 
 
 def run_integration_test():
@@ -245,29 +366,23 @@ def run_integration_test():
     print("Setting up test environment...")
     
     # Import and set up the models directly
-    from lib.models import Task, User
-    from lib.cli_tool import complete_task, list_tasks, list_users
-    import lib.cli_tool
+    from lib.cli_tool import Registry, complete_task, list_tasks, list_users
     
     # Create users and tasks to simulate the CLI state
-    users = {}
+    reg = Registry()
     
     # Add Alice with tasks
     alice = User("Alice")
-    users["Alice"] = alice
+    reg.users["Alice"] = alice
     print("Creating Alice with tasks...")
-    with StringIO() as output:
-        with redirect_stdout(output):
-            alice.add_task(Task("Write unit tests"))
-            alice.add_task(Task("Review code"))
+    alice.add_task(Task("Write unit tests"))
+    alice.add_task(Task("Review code"))
     
     # Add Bob with tasks  
     bob = User("Bob")
-    users["Bob"] = bob
+    reg.users["Bob"] = bob
     print("Creating Bob with tasks...")
-    with StringIO() as output:
-        with redirect_stdout(output):
-            bob.add_task(Task("Deploy application"))
+    bob.add_task(Task("Deploy application"))
     
     # Simulate CLI arguments
     class Args:
@@ -275,24 +390,15 @@ def run_integration_test():
             self.user = user
             self.title = title
     
-    # Temporarily patch the users dictionary
-    original_users = lib.cli_tool.users
-    lib.cli_tool.users = users
+    # Test completing a task
+    print("\nCompleting Alice's 'Write unit tests' task:")
+    complete_task(Args("Alice", "Write unit tests"), reg)
     
-    try:
-        # Test completing a task
-        print("\nCompleting Alice's 'Write unit tests' task:")
-        complete_task(Args("Alice", "Write unit tests"))
-        
-        print("\nListing Alice's tasks:")
-        list_tasks(Args("Alice"))
-        
-        print("\nListing all users:")
-        list_users(Args())
-        
-    finally:
-        # Restore original users dictionary
-        lib.cli_tool.users = original_users
+    print("\nListing Alice's tasks:")
+    list_tasks(Args("Alice"), reg)
+    
+    print("\nListing all users:")
+    list_users(Args(), reg)
     
     print("\n" + "=" * 50)
     print("INTEGRATION TEST COMPLETE")